@@ -1,83 +1,454 @@
 import sqlite3
 import os
-from flask import Flask, request, jsonify, send_from_directory
-from werkzeug.security import generate_password_hash, check_password_hash
+import queue
+import tempfile
+import hashlib
+import functools
+import contextlib
+import threading
+import time
+import orjson
+import fastjsonschema
+from flask import Flask, Response, g, has_app_context, request, jsonify, send_from_directory
+from flask.json.provider import JSONProvider
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
+from flask_compress import Compress
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
 
 # --- 1. INITIAL SETUP ---
+class OrjsonProvider(JSONProvider):
+    """Parses request bodies and renders jsonify() responses with orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app) 
+# Compress JSON listings for clients that accept it; bodies under 512 bytes aren't worth it
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 512
+Compress(app)
+if os.environ.get('BEHIND_PROXY') == '1':
+    # Trust X-Forwarded-For/-Proto/-Host from a single reverse proxy such as nginx
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
+# Per-IP rate limits; the in-memory store is per process, so point this at Redis under Gunicorn
+limiter = Limiter(get_remote_address, app=app, default_limits=["100/minute"],
+                  storage_uri=os.environ.get('RATELIMIT_STORAGE_URI', 'memory://'))
+WRITE_RATE_LIMIT = "10/minute"
 DATABASE = 'database.db'
+READ_POOL_SIZE = 4
+# Per-connection prepared-statement cache size (sqlite3 defaults to 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Per-connection pragmas; journal_mode=WAL is persistent and is set once in init_db()
+CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -20000",
+)
 
 # Configuration for file uploads
-UPLOAD_FOLDER = 'uploads'
+# In production point this at a directory outside the app (e.g. /srv/uploads) that nginx serves directly:
+#     location /uploads/ { alias /srv/uploads/; add_header Cache-Control "public, max-age=31536000, immutable"; }
+# Stored names are content-hashed, so a file at a given URL never changes and can be cached forever.
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True) 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+UPLOAD_BUFFER_SIZE = 1 << 20
+UPLOAD_CACHE_MAX_AGE = 31536000
+# Behind Apache (mod_xsendfile) or lighttpd, let the front-end server send downloads with sendfile()
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+
+# Development aid: count SQL statements per request and warn when a route exceeds its budget
+app.config['COUNT_QUERIES'] = os.environ.get('COUNT_QUERIES') == '1'
+# Transaction control is not counted. SQLite traces the firing statement again for each trigger step,
+# and executemany() once per row, so those count as extra statements.
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK')
+
+def _note_ids_budget():
+    """One UPDATE per STATUS_UPDATE_CHUNK ids in the request."""
+    data = request.get_json(silent=True)
+    note_ids = data.get('note_ids') if isinstance(data, dict) else None
+    if not isinstance(note_ids, list):
+        note_ids = []
+    return max(1, -(-len(note_ids) // STATUS_UPDATE_CHUNK))
+
+# Budgets are ints, or callables for endpoints whose statement count scales with the payload
+QUERY_BUDGETS = {
+    'register': 2,                  # email check + insert
+    'login': 2,                     # user lookup + optional password rehash
+    'upload_note': 2,               # seller check + insert
+    'upload_notes_bulk': lambda: 1 + len(request.files.getlist('note_file')),  # seller check + one per row
+    'browse_notes': 2,              # PRAGMA data_version, plus the listing SELECT on a cache miss
+    'purchase_note': 3,             # INSERT ... SELECT ... RETURNING + 2 trace entries for the UpdateSalesCount trigger
+    'get_pending_notes': 1,
+    'approve_note': 1,
+    'reject_note': 1,
+    'approve_notes': _note_ids_budget,
+    'reject_notes': _note_ids_budget,
+}
+
+def query_budget(endpoint):
+    """Returns the statement budget for an endpoint in the current request, or None if it has none."""
+    budget = QUERY_BUDGETS.get(endpoint)
+    return budget() if callable(budget) else budget
+
+# Argon2id hasher; parameters are stored in each encoded hash
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
+
+# --- SQL Statements ---
+# Shared constants so every call passes the same text and hits the connection's statement cache
+
+SQL_EMAIL_EXISTS = "SELECT 1 FROM Users WHERE email = ? LIMIT 1"
+# Only uniqueness conflicts are skipped; NOT NULL and CHECK failures still raise IntegrityError
+SQL_INSERT_USER = "INSERT INTO Users (name, email, password, role) VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING"
+SQL_SELECT_USER_BY_EMAIL = "SELECT user_id, name, role, password FROM Users WHERE email = ? LIMIT 1"
+SQL_UPDATE_USER_PASSWORD = "UPDATE Users SET password = ? WHERE user_id = ?"
+SQL_SELLER_EXISTS = "SELECT 1 FROM Users WHERE user_id = ? AND role = 'seller' LIMIT 1"
+SQL_INSERT_NOTE = ("INSERT INTO Notes (title, subject, description, price, seller_id, file_link, status) "
+                   "VALUES (?, ?, ?, ?, ?, ?, 'pending')")
+SQL_NOTE_FILE_IN_USE = "SELECT 1 FROM Notes WHERE file_link = ? LIMIT 1"
+SQL_SELECT_APPROVED_NOTES = "SELECT note_id, title, subject, description, price, seller_id FROM Notes WHERE status = 'approved'"
+SQL_SELECT_PENDING_NOTES = "SELECT note_id, title, subject, seller_id FROM Notes WHERE status = 'pending'"
+SQL_PURCHASE_NOTE = ("INSERT INTO Transactions (buyer_id, note_id, amount) "
+                     "SELECT ?, note_id, price FROM Notes WHERE note_id = ? AND status = 'approved' "
+                     "RETURNING (SELECT file_link FROM Notes WHERE Notes.note_id = Transactions.note_id) AS file_link")
+
+# --- Request Schemas ---
+SQLITE_MAX_INTEGER = 2**63 - 1
+# Compiled once at import; each validator raises fastjsonschema.JsonSchemaException on bad input
+
+def _required_object(*fields, types=None):
+    properties = {field: types for field in fields} if types else {}
+    return {'type': 'object', 'required': list(fields), 'properties': properties}
+
+REGISTER_SCHEMA = fastjsonschema.compile(_required_object('name', 'email', 'password', 'role', types={'type': 'string'}))
+LOGIN_SCHEMA = fastjsonschema.compile(_required_object('email', 'password', types={'type': 'string'}))
+# The front end sends note_id as a string taken from a data attribute
+# Integers are bounded to SQLite's 64-bit range so they always bind
+ROW_ID = {'type': ['integer', 'string'], 'minimum': 1, 'maximum': SQLITE_MAX_INTEGER}
+PURCHASE_SCHEMA = fastjsonschema.compile(_required_object('buyer_id', 'note_id', types=ROW_ID))
+NOTE_IDS_SCHEMA = fastjsonschema.compile({
+    'type': 'object',
+    'required': ['note_ids'],
+    'properties': {'note_ids': {'type': 'array', 'minItems': 1, 'items': {'type': 'integer', 'minimum': 1, 'maximum': SQLITE_MAX_INTEGER}}},
+})
+BULK_NOTES_SCHEMA = fastjsonschema.compile({
+    'type': 'array',
+    'minItems': 1,
+    'items': {
+        'type': 'object',
+        'required': ['title', 'subject', 'price'],
+        'properties': {
+            'title': {'type': 'string'},
+            'subject': {'type': 'string'},
+            'description': {'type': 'string'},
+            # Bounded so every accepted value binds as a SQLite INTEGER or REAL
+            'price': {'type': 'number', 'minimum': 0, 'maximum': SQLITE_MAX_INTEGER},
+        },
+    },
+})
+
+def is_valid(validator, data):
+    """Returns True if data passes the compiled schema validator."""
+    try:
+        validator(data)
+    except fastjsonschema.JsonSchemaException:
+        return False
+    return True
 
 # --- Database Helper Functions ---
 
-def get_db_connection():
-    """Establishes a connection to the database."""
-    conn = sqlite3.connect(DATABASE)
+# SQLite allows one writer at a time; past a handful of queued writers, fail fast instead of piling up on the lock.
+# Slots are held only around the database write itself, never while a request body is read or a password hashed.
+MAX_WRITERS = 8
+_writer_slots = threading.BoundedSemaphore(MAX_WRITERS)
+
+class WritersBusy(Exception):
+    """Raised when MAX_WRITERS database writes are already in flight."""
+
+@contextlib.contextmanager
+def writer_slot():
+    """Holds one of the MAX_WRITERS write slots, raising WritersBusy if none is free."""
+    if not _writer_slots.acquire(blocking=False):
+        raise WritersBusy()
+    try:
+        yield
+    finally:
+        _writer_slots.release()
+
+_read_pool = queue.Queue(maxsize=READ_POOL_SIZE)
+
+def _connect(readonly=False):
+    """Opens a new connection to the database."""
+    if readonly:
+        conn = sqlite3.connect(f"file:{DATABASE}?mode=ro", uri=True, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+    else:
+        conn = sqlite3.connect(DATABASE, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     conn.row_factory = sqlite3.Row
+    if app.config['COUNT_QUERIES']:
+        conn.set_trace_callback(_count_query)
     return conn
 
-def query_db(query, args=(), one=False):
-    """Helper function to run SELECT queries."""
-    conn = get_db_connection()
-    cur = conn.cursor()
+def _count_query(statement):
+    """Trace callback that tallies statements run during the current request."""
+    if has_app_context() and not statement.startswith(TRANSACTION_CONTROL):
+        g._query_count = g.get('_query_count', 0) + 1
+
+def init_db():
+    """Switches the database to WAL mode and creates the lookup indexes, if the schema is in place."""
+    if not os.path.exists(DATABASE):
+        app.logger.warning('%s not found; skipping WAL and index setup', DATABASE)
+        return
+
+    conn = _connect()
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        tables = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('Users', 'Notes')")}
+        if tables != {'Users', 'Notes'}:
+            app.logger.warning('Users/Notes tables missing from %s; skipping index setup', DATABASE)
+            return
+
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_notes_status ON Notes(status)")
+        try:
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON Users(email)")
+        except sqlite3.IntegrityError:
+            app.logger.error('Users has duplicate emails, so ix_users_email was not created; '
+                             'remove the duplicates and restart to enforce unique emails')
+        conn.commit()
+    finally:
+        conn.close()
+
+# One read-write connection per process, opened on first write; _write_lock serialises its use across threads
+_write_conn = None
+_write_lock = threading.Lock()
+
+@contextlib.contextmanager
+def write_db():
+    """Yields the process's shared read-write connection while holding a writer slot and the write lock.
+
+    Rolls back anything left uncommitted, so a failed write never leaks an open transaction to the next caller.
+    """
+    global _write_conn
+    with writer_slot(), _write_lock:
+        if _write_conn is None:
+            _write_conn = _connect()
+        try:
+            yield _write_conn
+        finally:
+            if _write_conn.in_transaction:
+                _write_conn.rollback()
+
+def get_read_db():
+    """Borrows a read-only connection from the pool for the current app context."""
+    db = g.get('_read_db')
+    if db is None:
+        try:
+            db = _read_pool.get_nowait()
+        except queue.Empty:
+            db = _connect(readonly=True)
+        g._read_db = db
+    return db
+
+@app.teardown_appcontext
+def close_db(exception):
+    """Returns the read connection to the pool."""
+    read_db = g.pop('_read_db', None)
+    if read_db is not None:
+        try:
+            _read_pool.put_nowait(read_db)
+        except queue.Full:
+            read_db.close()
+
+init_db()
+
+def query_db(query, args=(), one=False, as_tuples=False):
+    """Helper function to run SELECT queries. as_tuples skips the sqlite3.Row factory."""
+    cur = get_read_db().cursor()
+    if as_tuples:
+        cur.row_factory = None
     cur.execute(query, args)
     rv = cur.fetchall()
-    conn.close()
+    cur.close()
     return (rv[0] if rv else None) if one else rv
 
 def execute_db(query, args=()):
-    """Helper function to run INSERT, UPDATE, or DELETE queries."""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(query, args)
-    conn.commit()
-    conn.close()
+    """Helper function to run INSERT, UPDATE, or DELETE queries. Returns the affected row count."""
+    with write_db() as conn:
+        cur = conn.execute(query, args)
+        conn.commit()
+    return cur.rowcount
+
+def bulk_insert(query, rows):
+    """Runs one INSERT for many parameter rows in a single transaction. Returns the number of rows inserted."""
+    with write_db() as conn:
+        conn.execute("BEGIN")
+        cur = conn.executemany(query, rows)
+        conn.commit()
+    return cur.rowcount
+
+_version_conn = None
+_version_lock = threading.Lock()
+
+def get_data_version():
+    """Returns a number that changes whenever any connection, in any process, commits to the database."""
+    global _version_conn
+    with _version_lock:
+        if _version_conn is None:
+            _version_conn = _connect(readonly=True)
+        return _version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+@app.after_request
+def report_query_count(response):
+    """Adds X-Query-Count/X-Query-Budget headers and logs routes that go over their query budget."""
+    if app.config['COUNT_QUERIES']:
+        count = g.get('_query_count', 0)
+        response.headers['X-Query-Count'] = str(count)
+        budget = query_budget(request.endpoint)
+        if budget is not None:
+            response.headers['X-Query-Budget'] = str(budget)
+        if budget is not None and count > budget:
+            app.logger.warning('%s issued %d queries (budget %d)', request.endpoint, count, budget)
+    return response
+
+def verify_password(stored_hash, password):
+    """Checks a password against an Argon2 hash, or a legacy werkzeug pbkdf2 hash."""
+    if not stored_hash.startswith('$argon2'):
+        return check_password_hash(stored_hash, password)
+    try:
+        return password_hasher.verify(stored_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def save_upload(file, size_hint=None):
+    """Streams an uploaded file to disk in 1 MiB chunks.
+
+    Returns the content-hashed path and whether this call created it (False if the same file was already stored).
+    """
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=app.config['UPLOAD_FOLDER'], suffix='.part')
+    try:
+        with open(fd, 'wb', buffering=UPLOAD_BUFFER_SIZE) as out:
+            # mkstemp creates the file as 0600; the front-end server needs to read it
+            os.chmod(tmp_path, 0o644)
+            # size_hint is the whole request body, so it is an upper bound on the file size
+            if size_hint and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(out.fileno(), 0, size_hint)
+                except OSError:
+                    pass
+            while chunk := file.stream.read(UPLOAD_BUFFER_SIZE):
+                digest.update(chunk)
+                out.write(chunk)
+            out.truncate()
+
+        filename = f"{digest.hexdigest()[:16]}_{secure_filename(file.filename)}"
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        # link() claims the name atomically; a concurrent upload of the same file sees FileExistsError
+        try:
+            os.link(tmp_path, file_path)
+            is_new = True
+        except FileExistsError:
+            is_new = False
+    finally:
+        os.remove(tmp_path)
+    return file_path, is_new
+
+def discard_uploads(file_paths):
+    """Deletes files written by save_upload for a request that then failed, unless a note already uses them."""
+    for file_path in file_paths:
+        # A concurrent upload of the same content may have committed a note for this file meanwhile
+        if query_db(SQL_NOTE_FILE_IN_USE, (file_path,), one=True):
+            continue
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+# --- Write Backpressure ---
+
+@app.errorhandler(429)
+def rate_limit_exceeded(error):
+    """Returns JSON (the front end always parses JSON) with a Retry-After for the current limit window."""
+    retry_after = max(1, int(limiter.current_limit.reset_at - time.time())) if limiter.current_limit else 60
+    return jsonify({'message': 'Too many requests, please slow down.'}), 429, {'Retry-After': str(retry_after)}
+
+@app.errorhandler(WritersBusy)
+def writers_busy(error):
+    """Sheds a write with 503 + Retry-After when MAX_WRITERS database writes are already in flight."""
+    return jsonify({'message': 'Server is busy, please retry shortly.'}), 503, {'Retry-After': '1'}
 
 # --- API ENDPOINTS (User Management) ---
 
 @app.route('/register', methods=['POST'])
+@limiter.limit(WRITE_RATE_LIMIT)
 def register():
     data = request.get_json()
-    if not all(key in data for key in ['name', 'email', 'password', 'role']):
+    if not is_valid(REGISTER_SCHEMA, data):
         return jsonify({'message': 'Missing required fields!'}), 400
 
-    user = query_db("SELECT * FROM Users WHERE email = ?", (data['email'],), one=True)
-    if user:
+    # Cheap check first so a duplicate email doesn't pay for an Argon2 hash
+    if query_db(SQL_EMAIL_EXISTS, (data['email'],), one=True):
         return jsonify({'message': 'Email already registered!'}), 409
 
-    hashed_password = generate_password_hash(data['password'], method='pbkdf2:sha256')
+    hashed_password = password_hasher.hash(data['password'])
     
-    execute_db("INSERT INTO Users (name, email, password, role) VALUES (?, ?, ?, ?)",
-               (data['name'], data['email'], hashed_password, data['role']))
+    # A concurrent registration of the same email hits ix_users_email and inserts nothing
+    try:
+        created = execute_db(SQL_INSERT_USER,
+                             (data['name'], data['email'], hashed_password, data['role']))
+    except sqlite3.IntegrityError:
+        return jsonify({'message': 'Invalid user details!'}), 400
+    if not created:
+        return jsonify({'message': 'Email already registered!'}), 409
 
     return jsonify({'message': 'New user created successfully!'}), 201
 
 @app.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
-    if not all(key in data for key in ['email', 'password']):
+    if not is_valid(LOGIN_SCHEMA, data):
         return jsonify({'message': 'Missing email or password!'}), 400
 
-    user = query_db("SELECT * FROM Users WHERE email = ?", (data['email'],), one=True)
+    user = query_db(SQL_SELECT_USER_BY_EMAIL, (data['email'],), one=True)
     
-    if not user or not check_password_hash(user['password'], data['password']):
+    # Index access skips sqlite3.Row's column-name lookup; order matches the SELECT above
+    if not user or not verify_password(user[3], data['password']):
         return jsonify({'message': 'Login failed! Check email and password.'}), 401
+
+    # Upgrade legacy pbkdf2 hashes (or outdated Argon2 parameters) now that we have the plaintext
+    if not user[3].startswith('$argon2') or password_hasher.check_needs_rehash(user[3]):
+        new_hash = password_hasher.hash(data['password'])
+        try:
+            execute_db(SQL_UPDATE_USER_PASSWORD, (new_hash, user[0]))
+        except WritersBusy:
+            pass  # best effort; the hash is upgraded on a later login instead
     
     return jsonify({
         'message': 'Login successful!',
-        'user': {'user_id': user['user_id'], 'name': user['name'], 'email': user['email'], 'role': user['role']}
+        'user': {'user_id': user[0], 'name': user[1], 'email': data['email'], 'role': user[2]}
     }), 200
 
 # --- API ENDPOINTS (Notes and Purchases) ---
 
 @app.route('/notes', methods=['POST'])
+@limiter.limit(WRITE_RATE_LIMIT)
 def upload_note():
     required_fields = ['title', 'subject', 'price', 'seller_id']
     if not all(field in request.form for field in required_fields):
@@ -96,41 +467,98 @@ def upload_note():
     seller_id = request.form['seller_id']
     description = request.form.get('description', '')
 
-    seller = query_db("SELECT * FROM Users WHERE user_id = ? AND role = 'seller'", (seller_id,), one=True)
+    seller = query_db(SQL_SELLER_EXISTS, (seller_id,), one=True)
     if not seller:
         return jsonify({'message': 'Seller not found or user is not a seller!'}), 404
 
     if file:
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        file_path, is_new = save_upload(file, request.content_length)
 
-        execute_db("INSERT INTO Notes (title, subject, description, price, seller_id, file_link, status) VALUES (?, ?, ?, ?, ?, ?, 'pending')",
-                   (title, subject, description, price, seller_id, file_path))
+        try:
+            execute_db(SQL_INSERT_NOTE,
+                       (title, subject, description, price, seller_id, file_path))
+        except BaseException:
+            if is_new:
+                discard_uploads([file_path])
+            raise
 
         return jsonify({'message': 'Note uploaded successfully and is pending admin approval.'}), 201
 
     return jsonify({'message': 'File error occurred!'}), 400
 
+@app.route('/notes/bulk', methods=['POST'])
+@limiter.limit(WRITE_RATE_LIMIT)
+def upload_notes_bulk():
+    """Uploads many notes at once: a JSON array in the 'notes' form field, one 'note_file' per entry."""
+    if 'seller_id' not in request.form or 'notes' not in request.form:
+        return jsonify({'message': 'Missing required form fields!'}), 400
+    try:
+        notes = orjson.loads(request.form['notes'])
+    except orjson.JSONDecodeError:
+        return jsonify({'message': "'notes' must be a JSON array!"}), 400
+    if not is_valid(BULK_NOTES_SCHEMA, notes):
+        return jsonify({'message': "'notes' must be a non-empty array of notes with a text title and subject and a numeric price!"}), 400
+
+    files = request.files.getlist('note_file')
+    if len(files) != len(notes) or any(file.filename == '' for file in files):
+        return jsonify({'message': 'Exactly one file is required per note!'}), 400
+
+    seller_id = request.form['seller_id']
+    seller = query_db(SQL_SELLER_EXISTS, (seller_id,), one=True)
+    if not seller:
+        return jsonify({'message': 'Seller not found or user is not a seller!'}), 404
+
+    rows = []
+    new_files = []
+    try:
+        for note, file in zip(notes, files):
+            file_path, is_new = save_upload(file)
+            if is_new:
+                new_files.append(file_path)
+            rows.append((note['title'], note['subject'], note.get('description', ''), note['price'], seller_id, file_path))
+
+        created = bulk_insert(SQL_INSERT_NOTE, rows)
+    except BaseException:
+        discard_uploads(new_files)
+        raise
+    return jsonify({'message': f'{created} note(s) uploaded successfully and pending admin approval.'}), 201
+
+@functools.lru_cache(maxsize=1)
+def render_approved_notes(data_version):
+    """Builds the /notes JSON body and its ETag; cached until the database changes."""
+    notes_list = query_db(SQL_SELECT_APPROVED_NOTES, as_tuples=True)
+    # Unpack in SQL_SELECT_APPROVED_NOTES column order; literal keys avoid zip() and dict() per row
+    body = orjson.dumps({'notes': [
+        {'note_id': note_id, 'title': title, 'subject': subject, 'description': description,
+         'price': price, 'seller_id': seller_id}
+        for note_id, title, subject, description, price, seller_id in notes_list
+    ]})
+    # Hash the body rather than use data_version, which differs between connections and processes
+    return hashlib.sha1(body).hexdigest(), body
+
 @app.route('/notes', methods=['GET'])
 def browse_notes():
-    notes_list = query_db("SELECT note_id, title, subject, description, price, seller_id FROM Notes WHERE status = 'approved'")
-    notes_dict = [dict(note) for note in notes_list]
-    return jsonify({'notes': notes_dict})
+    etag, body = render_approved_notes(get_data_version())
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 @app.route('/purchase', methods=['POST'])
+@limiter.limit(WRITE_RATE_LIMIT)
 def purchase_note():
     data = request.get_json()
-    if not all(key in data for key in ['buyer_id', 'note_id']):
+    if not is_valid(PURCHASE_SCHEMA, data):
         return jsonify({'message': 'Buyer ID and Note ID are required!'}), 400
         
-    note_to_buy = query_db("SELECT price, file_link FROM Notes WHERE note_id = ? AND status = 'approved'", (data['note_id'],), one=True)
+    # Validate and insert under one write lock; the trigger on Transactions bumps sales_count
+    with write_db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        note_to_buy = conn.execute(SQL_PURCHASE_NOTE, (data['buyer_id'], data['note_id'])).fetchone()
+        conn.commit()
+
     if not note_to_buy:
         return jsonify({'message': 'Note not found or not available for purchase!'}), 404
 
-    execute_db("INSERT INTO Transactions (buyer_id, note_id, amount) VALUES (?, ?, ?)",
-               (data['buyer_id'], data['note_id'], note_to_buy['price']))
-
     filename = os.path.basename(note_to_buy['file_link']) 
     download_url = f"/uploads/{filename}"
 
@@ -139,26 +567,76 @@ def purchase_note():
 # --- Endpoint to serve/download the uploaded files ---
 @app.route('/uploads/<path:filename>', methods=['GET'])
 def download_file(filename):
-    """Serves a file from the upload directory."""
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename, as_attachment=True)
+    """Fallback for serving uploads when nginx isn't in front; with USE_X_SENDFILE only an X-Sendfile header is sent."""
+    response = send_from_directory(app.config['UPLOAD_FOLDER'], filename, as_attachment=True,
+                                   max_age=UPLOAD_CACHE_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
 
 # --- API ENDPOINTS (Admin Functionality) ---
 
 @app.route('/admin/notes/pending', methods=['GET'])
 def get_pending_notes():
-    pending_notes = query_db("SELECT note_id, title, subject, seller_id FROM Notes WHERE status = 'pending'")
-    return jsonify({'pending_notes': [dict(note) for note in pending_notes]})
+    pending_notes = query_db(SQL_SELECT_PENDING_NOTES, as_tuples=True)
+    body = orjson.dumps({'pending_notes': [
+        {'note_id': note_id, 'title': title, 'subject': subject, 'seller_id': seller_id}
+        for note_id, title, subject, seller_id in pending_notes
+    ]})
+    return Response(body, mimetype='application/json')
+
+# SQLite's default limit on bound parameters per statement is 999
+STATUS_UPDATE_CHUNK = 500
+
+def set_notes_status(note_ids, status):
+    """Sets the status of many notes in a single transaction. Returns the number of notes updated."""
+    updated = 0
+    with write_db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for i in range(0, len(note_ids), STATUS_UPDATE_CHUNK):
+            chunk = note_ids[i:i + STATUS_UPDATE_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            cur = conn.execute(f"UPDATE Notes SET status = ? WHERE note_id IN ({placeholders})",
+                               (status, *chunk))
+            updated += cur.rowcount
+        conn.commit()
+    return updated
+
+def get_note_ids_from_request():
+    """Reads the 'note_ids' list from the JSON body, or returns None if it is missing or invalid."""
+    data = request.get_json(silent=True)
+    if not is_valid(NOTE_IDS_SCHEMA, data):
+        return None
+    return data['note_ids']
+
+@app.route('/admin/notes/approve', methods=['PUT'])
+def approve_notes():
+    note_ids = get_note_ids_from_request()
+    if note_ids is None:
+        return jsonify({'message': 'A non-empty list of integer note_ids is required!'}), 400
+    updated = set_notes_status(note_ids, 'approved')
+    return jsonify({'message': f'{updated} note(s) have been approved.', 'updated': updated})
+
+@app.route('/admin/notes/reject', methods=['PUT'])
+def reject_notes():
+    note_ids = get_note_ids_from_request()
+    if note_ids is None:
+        return jsonify({'message': 'A non-empty list of integer note_ids is required!'}), 400
+    updated = set_notes_status(note_ids, 'rejected')
+    return jsonify({'message': f'{updated} note(s) have been rejected.', 'updated': updated})
 
 @app.route('/admin/notes/<int:note_id>/approve', methods=['PUT'])
 def approve_note(note_id):
-    execute_db("UPDATE Notes SET status = 'approved' WHERE note_id = ?", (note_id,))
+    set_notes_status([note_id], 'approved')
     return jsonify({'message': f'Note {note_id} has been approved.'})
 
 @app.route('/admin/notes/<int:note_id>/reject', methods=['PUT'])
 def reject_note(note_id):
-    execute_db("UPDATE Notes SET status = 'rejected' WHERE note_id = ?", (note_id,))
+    set_notes_status([note_id], 'rejected')
     return jsonify({'message': f'Note {note_id} has been rejected.'})
 
 # --- MAIN EXECUTION ---
+# Development only; set FLASK_DEBUG=1 for the debugger and reloader. In production run
+# under Gunicorn, preferring worker processes over threads since password hashing is CPU-bound:
+#     gunicorn -k gthread -w $(nproc) --threads 8 app:app
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run()
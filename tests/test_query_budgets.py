@@ -0,0 +1,173 @@
+import importlib
+import io
+import os
+import sqlite3
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Minimal copy of the tables and trigger the app expects in database.db
+SCHEMA = """
+CREATE TABLE Users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL
+);
+CREATE TABLE Notes (
+    note_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    subject TEXT,
+    description TEXT,
+    price REAL,
+    seller_id INTEGER,
+    file_link TEXT,
+    status TEXT,
+    sales_count INTEGER DEFAULT 0
+);
+CREATE TABLE Transactions (
+    transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    buyer_id INTEGER,
+    note_id INTEGER,
+    amount REAL,
+    purchase_date TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TRIGGER UpdateSalesCount
+AFTER INSERT ON Transactions
+FOR EACH ROW
+BEGIN
+    UPDATE Notes SET sales_count = sales_count + 1 WHERE note_id = NEW.note_id;
+END;
+"""
+
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    """Imports app with query counting on, against a fresh database in a scratch directory."""
+    workdir = tmp_path_factory.mktemp('app')
+    conn = sqlite3.connect(workdir / 'database.db')
+    conn.executescript(SCHEMA)
+    conn.close()
+
+    old_cwd = os.getcwd()
+    old_env = os.environ.get('COUNT_QUERIES')
+    os.chdir(workdir)
+    os.environ['COUNT_QUERIES'] = '1'
+    sys.path.insert(0, APP_DIR)
+    try:
+        module = importlib.reload(sys.modules['app']) if 'app' in sys.modules else importlib.import_module('app')
+        module.app.config['UPLOAD_FOLDER'] = str(workdir / 'uploads')
+        module.limiter.enabled = False
+        yield module
+    finally:
+        sys.path.remove(APP_DIR)
+        os.chdir(old_cwd)
+        if old_env is None:
+            os.environ.pop('COUNT_QUERIES', None)
+        else:
+            os.environ['COUNT_QUERIES'] = old_env
+
+
+@pytest.fixture(scope='module')
+def client(app_module):
+    client = app_module.app.test_client()
+    client.post('/register', json={'name': 'Seller', 'email': 'seller@example.com', 'password': 'pw', 'role': 'seller'})
+    client.post('/register', json={'name': 'Buyer', 'email': 'buyer@example.com', 'password': 'pw', 'role': 'buyer'})
+    for i in range(3):
+        client.post('/notes', data={'title': f'Note {i}', 'subject': 'Maths', 'price': '5', 'seller_id': '1',
+                                    'note_file': (io.BytesIO(b'pdf %d' % i), f'note{i}.pdf')},
+                    content_type='multipart/form-data')
+    client.put('/admin/notes/approve', json={'note_ids': [1, 2]})
+    return client
+
+
+def query_count(response):
+    return int(response.headers['X-Query-Count'])
+
+
+def assert_within_budget(response, budget):
+    """Fails if the route issued more than `budget` statements; budgets are fixed here, not read from the app."""
+    assert 'X-Query-Budget' in response.headers
+    assert query_count(response) <= budget
+
+
+def test_browse_notes_budget(client):
+    client.get('/notes')
+    response = client.get('/notes')
+    assert response.status_code == 200
+    # Served from the render cache: only PRAGMA data_version runs
+    assert query_count(response) <= 1
+
+
+def test_browse_notes_cache_miss_budget(client, app_module):
+    app_module.render_approved_notes.cache_clear()
+    response = client.get('/notes')
+    # PRAGMA data_version + the listing SELECT
+    assert_within_budget(response, 2)
+
+
+def test_purchase_budget(client):
+    response = client.post('/purchase', json={'buyer_id': 2, 'note_id': 1})
+    assert response.status_code == 200
+    # One INSERT ... SELECT ... RETURNING; SQLite's trace reports the statement twice more for the
+    # UpdateSalesCount trigger it fires
+    assert_within_budget(response, 3)
+
+
+def test_register_budget(client):
+    response = client.post('/register', json={'name': 'B2', 'email': 'b2@example.com', 'password': 'pw',
+                                               'role': 'buyer'})
+    assert response.status_code == 201
+    # Email check + insert
+    assert_within_budget(response, 2)
+
+
+def test_login_budget(client):
+    response = client.post('/login', json={'email': 'buyer@example.com', 'password': 'pw'})
+    assert response.status_code == 200
+    # User lookup + optional password rehash
+    assert_within_budget(response, 2)
+
+
+def test_upload_note_budget(client):
+    response = client.post('/notes', data={'title': 'T', 'subject': 'S', 'price': '1', 'seller_id': '1',
+                                           'note_file': (io.BytesIO(b'single'), 'single.pdf')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 201
+    # Seller check + insert
+    assert_within_budget(response, 2)
+
+
+def test_upload_notes_bulk_budget(client):
+    response = client.post('/notes/bulk', data={
+        'seller_id': '1',
+        'notes': '[{"title": "A", "subject": "S", "price": 1}, {"title": "B", "subject": "S", "price": 2}]',
+        'note_file': [(io.BytesIO(b'a'), 'a.pdf'), (io.BytesIO(b'b'), 'b.pdf')],
+    }, content_type='multipart/form-data')
+    assert response.status_code == 201
+    # Seller check + executemany, traced once per row
+    assert_within_budget(response, 3)
+
+
+@pytest.mark.parametrize('method, url, body', [
+    ('get', '/admin/notes/pending', None),
+    ('put', '/admin/notes/3/approve', None),
+    ('put', '/admin/notes/3/reject', None),
+    # Up to STATUS_UPDATE_CHUNK ids go in a single UPDATE
+    ('put', '/admin/notes/approve', {'note_ids': [1, 2, 3]}),
+    ('put', '/admin/notes/reject', {'note_ids': [3]}),
+])
+def test_admin_budget(client, method, url, body):
+    response = getattr(client, method)(url, json=body)
+    assert response.status_code == 200
+    assert_within_budget(response, 1)
+
+
+@pytest.mark.parametrize('body', [{'note_ids': 5}, {'note_ids': 'abc'}, {'note_ids': None}, [1, 2]])
+def test_bad_note_ids_still_400_with_counting(client, body):
+    response = client.put('/admin/notes/approve', json=body)
+    assert response.status_code == 400
+    assert 'X-Query-Budget' in response.headers